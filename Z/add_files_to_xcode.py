@@ -1,12 +1,103 @@
 #!/usr/bin/env python3
 import os
-import uuid
-import glob
-
-# Read the pbxproj file
+import re
+import sys
+import mmap
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Every insertion point in the pbxproj, matched in one left-to-right sweep.
+# Entries go before the end-of-section markers, at the start of the Frameworks
+# phase files list and at the end of the Sources phase files list. Negated
+# character classes bound each match to its own block without backtracking;
+# the files list runs to its ");" terminator, so a ")" inside an entry's
+# comment (e.g. "Image (1).swift") does not end it early.
+MARKERS_RE = re.compile(
+    rb'(?P<buildfile>/\* End PBXBuildFile section \*/)'
+    rb'|(?P<fileref>/\* End PBXFileReference section \*/)'
+    rb'|(?P<frameworks>A1000000294A0000000000000 /\* Frameworks \*/ = \{[^(]*files = \()'
+    rb'|(?P<sources>/\* Begin PBXSourcesBuildPhase section \*/[^(]*files = \([^)]*(?:\)(?!;)[^)]*)*(?=\);\s+runOnlyForDeploymentPostprocessing))'
+)
+INSERT_BEFORE_MARKER = {'buildfile', 'fileref'}
+
+# Large write buffer so the rewritten project reaches the kernel in a few writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+# File reference paths already in the project; used to skip re-adding files.
+# Only run over the PBXFileReference section so group paths are not picked up.
+EXISTING_PATH_RE = re.compile(rb'\bpath = "?([^";\n]+)"?;')
+FILE_REF_BEGIN = b'/* Begin PBXFileReference section */'
+FILE_REF_END = b'/* End PBXFileReference section */'
+
+# lastKnownFileType for each source suffix picked up by the directory walk
+SOURCE_FILE_TYPES = {
+    b'.swift': b'sourcecode.swift',
+    b'.metal': b'sourcecode.metal',
+}
+SOURCE_SUFFIXES = tuple(SOURCE_FILE_TYPES)
+
+# pbxproj entry templates, filled with %-formatting in the generation loops.
+# The project file is ASCII, so everything stays bytes end to end.
+BUILD_FILE_TMPL = b"\t\t%s /* %s in Sources */ = {isa = PBXBuildFile; fileRef = %s /* %s */; };\n"
+FILE_REF_TMPL = b"\t\t%s /* %s */ = {isa = PBXFileReference; lastKnownFileType = %s; path = %s; sourceTree = \"<group>\"; };\n"
+SOURCES_PHASE_TMPL = b"\t\t\t\t%s /* %s in Sources */,\n"
+FW_BUILD_FILE_TMPL = b"\t\t%s /* %s in Frameworks */ = {isa = PBXBuildFile; fileRef = %s /* %s */; };\n"
+FW_FILE_REF_TMPL = b"\t\t%s /* %s */ = {isa = PBXFileReference; lastKnownFileType = wrapper.framework; name = %s; path = System/Library/Frameworks/%s; sourceTree = SDKROOT; };\n"
+FRAMEWORKS_PHASE_TMPL = b"\t\t\t\t%s /* %s in Frameworks */,\n"
+
+
+def make_id(kind, key):
+    """24-hex-char pbxproj object ID, stable across runs for the same key."""
+    return hashlib.md5(b"com.dualcamera.%s.%s" % (kind, key)).hexdigest()[:24].upper().encode()
+
+
+def iter_source_files(root, visited=None):
+    """Yield (path, file_type) for every source file under root in a single directory walk.
+
+    Like the recursive glob this replaced, dot entries (including macOS ._*
+    AppleDouble sidecars) are skipped, symlinked folders are followed and
+    unreadable folders are skipped. Each folder is walked only once, so a
+    symlink back to a parent cannot loop.
+    """
+    if visited is None:
+        visited = set()
+    try:
+        st = os.stat(root)
+        if (st.st_dev, st.st_ino) in visited:
+            return
+        visited.add((st.st_dev, st.st_ino))
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith(b'.'):
+            continue
+        if entry.is_dir():
+            yield from iter_source_files(entry.path, visited)
+        elif entry.name.endswith(SOURCE_SUFFIXES):
+            name = entry.name
+            yield entry.path, SOURCE_FILE_TYPES[name[name.rfind(b'.'):]]
+
+
+def scan_existing_paths(mm):
+    """Paths of every PBXFileReference already in the mapped project."""
+    file_ref_start = mm.find(FILE_REF_BEGIN)
+    file_ref_end = mm.find(FILE_REF_END, file_ref_start)
+    return frozenset(EXISTING_PATH_RE.findall(mm, file_ref_start, file_ref_end))
+
+
+def list_source_files(folder_path):
+    """All source files under folder_path, or none if the folder is missing."""
+    if not os.path.exists(folder_path):
+        return []
+    return list(iter_source_files(os.fsencode(folder_path)))
+
+
+# Map the pbxproj file read-only; it is scanned in place rather than copied
 pbxproj_path = "/Users/letsmakemillions/Desktop/APp/Z/DualApp.xcodeproj/project.pbxproj"
-with open(pbxproj_path, 'r') as f:
-    content = f.read()
+with open(pbxproj_path, 'rb') as f:
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 # Find all Swift files in Core, App, VideoProcessing, Features folders
 base_path = "/Users/letsmakemillions/Desktop/APp/Z/DualApp"
@@ -17,160 +108,113 @@ folders_to_add = [
     "Features"
 ]
 
+# The folder walks and the project scan are independent and mostly wait on
+# the filesystem, so run them all concurrently
 files_to_add = []
-for folder in folders_to_add:
-    folder_path = os.path.join(base_path, folder)
-    if os.path.exists(folder_path):
-        swift_files = glob.glob(f"{folder_path}/**/*.swift", recursive=True)
-        metal_files = glob.glob(f"{folder_path}/**/*.metal", recursive=True)
-        files_to_add.extend(swift_files + metal_files)
-
-# Generate UUIDs for each file
-file_refs = []
-build_files = []
-
-for file_path in files_to_add:
-    rel_path = file_path.replace(base_path + "/", "")
-    filename = os.path.basename(file_path)
+with ThreadPoolExecutor(max_workers=len(folders_to_add) + 1) as executor:
+    existing_future = executor.submit(scan_existing_paths, mm)
+    folder_paths = [os.path.join(base_path, folder) for folder in folders_to_add]
+    for folder_files in executor.map(list_source_files, folder_paths):
+        files_to_add.extend(folder_files)
+    existing_paths = existing_future.result()
+
+# Per-file columns, kept as parallel lists so entries can be formatted by
+# zipping them straight into the templates
+names = []
+rel_paths = []
+file_types = []
+file_ref_ids = []
+build_file_ids = []
+
+base_prefix = os.fsencode(base_path) + b"/"
+for file_path, file_type in files_to_add:
+    rel_path = file_path.removeprefix(base_prefix)
+    if rel_path in existing_paths:
+        continue
+    filename = file_path.rpartition(b'/')[2]
     
-    # Generate unique IDs
-    file_ref_id = uuid.uuid4().hex[:24].upper()
-    build_file_id = uuid.uuid4().hex[:24].upper()
-    
-    file_refs.append({
-        'id': file_ref_id,
-        'path': rel_path,
-        'name': filename
-    })
-    
-    build_files.append({
-        'id': build_file_id,
-        'file_ref_id': file_ref_id,
-        'name': filename
-    })
-
-# Insert PBXBuildFile entries after line 66
-pbxbuildfile_section = "/* End PBXBuildFile section */"
-new_build_entries = []
-for bf in build_files:
-    entry = f"\t\t{bf['id']} /* {bf['name']} in Sources */ = {{isa = PBXBuildFile; fileRef = {bf['file_ref_id']} /* {bf['name']} */; }};\n"
-    new_build_entries.append(entry)
-
-content = content.replace(
-    pbxbuildfile_section,
-    ''.join(new_build_entries) + pbxbuildfile_section
-)
+    names.append(filename)
+    rel_paths.append(rel_path)
+    file_types.append(file_type)
+    # Derive IDs from the project-relative path so re-runs produce the same IDs
+    file_ref_ids.append(make_id(b"fileref", rel_path))
+    build_file_ids.append(make_id(b"buildfile", rel_path))
 
-# Insert PBXFileReference entries after line 128
-pbxfilereference_section = "/* End PBXFileReference section */"
-new_file_ref_entries = []
-for fr in file_refs:
-    file_type = "sourcecode.swift" if fr['name'].endswith('.swift') else "sourcecode.metal"
-    entry = f"\t\t{fr['id']} /* {fr['name']} */ = {{isa = PBXFileReference; lastKnownFileType = {file_type}; path = {fr['path']}; sourceTree = \"<group>\"; }};\n"
-    new_file_ref_entries.append(entry)
-
-content = content.replace(
-    pbxfilereference_section,
-    ''.join(new_file_ref_entries) + pbxfilereference_section
-)
-
-# Insert into Sources build phase (before line 330)
-sources_section_end = "\t\t\t);\n\t\t\trunOnlyForDeploymentPostprocessing = 0;\n\t\t};\n/* End PBXSourcesBuildPhase section */"
-new_source_entries = []
-for bf in build_files:
-    entry = f"\t\t\t\t{bf['id']} /* {bf['name']} in Sources */,\n"
-    new_source_entries.append(entry)
-
-# Find the sources build phase section and add entries before the closing
-import re
-sources_pattern = r'(/\* Begin PBXSourcesBuildPhase section \*/.*?files = \()(.*?)(\);\s+runOnlyForDeploymentPostprocessing)'
-match = re.search(sources_pattern, content, re.DOTALL)
-if match:
-    before = match.group(1)
-    existing = match.group(2)
-    after = match.group(3)
-    new_sources = before + existing + ''.join(new_source_entries) + after
-    content = re.sub(sources_pattern, new_sources, content, flags=re.DOTALL)
+new_build_entries = list(map(BUILD_FILE_TMPL.__mod__, zip(build_file_ids, names, file_ref_ids, names)))
+new_file_ref_entries = list(map(FILE_REF_TMPL.__mod__, zip(file_ref_ids, names, file_types, rel_paths)))
+new_source_entries = list(map(SOURCES_PHASE_TMPL.__mod__, zip(build_file_ids, names)))
 
 # Add frameworks to PBXFrameworksBuildPhase
 frameworks = [
-    "AVFoundation.framework",
-    "CoreImage.framework", 
-    "Metal.framework",
-    "MetalKit.framework",
-    "Photos.framework",
-    "PhotosUI.framework",
-    "Combine.framework",
-    "SwiftUI.framework"
+    b"AVFoundation.framework",
+    b"CoreImage.framework", 
+    b"Metal.framework",
+    b"MetalKit.framework",
+    b"Photos.framework",
+    b"PhotosUI.framework",
+    b"Combine.framework",
+    b"SwiftUI.framework"
 ]
-
-# Frameworks section is currently empty, add framework references
-framework_refs = []
-framework_builds = []
-
-for fw in frameworks:
-    fw_ref_id = uuid.uuid4().hex[:24].upper()
-    fw_build_id = uuid.uuid4().hex[:24].upper()
-    
-    framework_refs.append({
-        'id': fw_ref_id,
-        'name': fw
-    })
-    framework_builds.append({
-        'id': fw_build_id,
-        'file_ref_id': fw_ref_id,
-        'name': fw
-    })
-
-# Add framework file references
-new_fw_refs = []
-for fwr in framework_refs:
-    entry = f"\t\t{fwr['id']} /* {fwr['name']} */ = {{isa = PBXFileReference; lastKnownFileType = wrapper.framework; name = {fwr['name']}; path = System/Library/Frameworks/{fwr['name']}; sourceTree = SDKROOT; }};\n"
-    new_fw_refs.append(entry)
-
-content = content.replace(
-    pbxfilereference_section,
-    ''.join(new_fw_refs) + pbxfilereference_section
-)
-
-# Add framework build files
-new_fw_builds = []
-for fwb in framework_builds:
-    entry = f"\t\t{fwb['id']} /* {fwb['name']} in Frameworks */ = {{isa = PBXBuildFile; fileRef = {fwb['file_ref_id']} /* {fwb['name']} */; }};\n"
-    new_fw_builds.append(entry)
-
-content = content.replace(
-    pbxbuildfile_section,
-    ''.join(new_fw_builds) + pbxbuildfile_section
-)
-
-# Add to Frameworks build phase
-frameworks_pattern = r'(A1000000294A0000000000000 /\* Frameworks \*/ = \{.*?files = \()(.*?)(\);)'
-fw_match = re.search(frameworks_pattern, content, re.DOTALL)
-if fw_match:
-    before = fw_match.group(1)
-    existing = fw_match.group(2)
-    after = fw_match.group(3)
-    
-    new_fw_entries = []
-    for fwb in framework_builds:
-        entry = f"\t\t\t\t{fwb['id']} /* {fwb['name']} in Frameworks */,\n"
-        new_fw_entries.append(entry)
-    
-    new_frameworks = before + ''.join(new_fw_entries) + existing + after
-    content = re.sub(frameworks_pattern, new_frameworks, content, flags=re.DOTALL)
-
-# Write back
-with open(pbxproj_path, 'w') as f:
-    f.write(content)
-
-print(f"✅ Added {len(files_to_add)} source files to Xcode project")
-print(f"✅ Added {len(frameworks)} frameworks to Xcode project")
+new_frameworks = [fw for fw in frameworks if b"System/Library/Frameworks/" + fw not in existing_paths]
+
+# Nothing new to add: leave the project file untouched
+if not names and not new_frameworks:
+    mm.close()
+    print("✅ Xcode project already contains all source files and frameworks")
+    sys.exit(0)
+
+fw_ref_ids = [make_id(b"fileref", fw) for fw in new_frameworks]
+fw_build_ids = [make_id(b"buildfile", fw) for fw in new_frameworks]
+
+new_fw_refs = list(map(FW_FILE_REF_TMPL.__mod__, zip(fw_ref_ids, new_frameworks, new_frameworks, new_frameworks)))
+new_fw_builds = list(map(FW_BUILD_FILE_TMPL.__mod__, zip(fw_build_ids, new_frameworks, fw_ref_ids, new_frameworks)))
+new_fw_entries = list(map(FRAMEWORKS_PHASE_TMPL.__mod__, zip(fw_build_ids, new_frameworks)))
+
+# Stream the original bytes and the new entries to a temporary file during a
+# single sweep over the mapped content, then move it into place
+inserts_by_marker = {
+    'buildfile': new_build_entries + new_fw_builds,
+    'fileref': new_file_ref_entries + new_fw_refs,
+    'frameworks': new_fw_entries,
+    'sources': new_source_entries,
+}
+tmp_path = pbxproj_path + '.tmp'
+with memoryview(mm) as view, open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as out:
+    prev_end = 0
+    seen_markers = set()
+    for m in MARKERS_RE.finditer(mm):
+        seen_markers.add(m.lastgroup)
+        inserts = b''.join(inserts_by_marker[m.lastgroup])
+        if m.lastgroup in INSERT_BEFORE_MARKER:
+            out.write(view[prev_end:m.start()])
+            out.write(inserts)
+            out.write(view[m.start():m.end()])
+        else:
+            out.write(view[prev_end:m.end()])
+            out.write(inserts)
+        prev_end = m.end()
+    out.write(view[prev_end:])
+    # Every section with pending entries must have been found, otherwise the
+    # written objects would be left dangling (e.g. build files never compiled)
+    missing_markers = [group for group, inserts in inserts_by_marker.items()
+                       if inserts and group not in seen_markers]
+    if not missing_markers:
+        # Make sure the new contents are on disk before they replace the project
+        out.flush()
+        os.fsync(out.fileno())
+mm.close()
+if missing_markers:
+    os.remove(tmp_path)
+    sys.exit(f"❌ Could not find the {', '.join(missing_markers)} section(s) in {pbxproj_path}; project left unchanged")
+os.replace(tmp_path, pbxproj_path)
+
+print(f"✅ Added {len(names)} source files to Xcode project ({len(files_to_add) - len(names)} already present)")
+print(f"✅ Added {len(new_frameworks)} frameworks to Xcode project ({len(frameworks) - len(new_frameworks)} already present)")
 print("\nFiles added:")
-for f in files_to_add[:10]:
-    print(f"  - {os.path.basename(f)}")
-if len(files_to_add) > 10:
-    print(f"  ... and {len(files_to_add) - 10} more")
+for name in names[:10]:
+    print(f"  - {os.fsdecode(name)}")
+if len(names) > 10:
+    print(f"  ... and {len(names) - 10} more")
 print("\nFrameworks added:")
-for fw in frameworks:
-    print(f"  - {fw}")
+for fw in new_frameworks:
+    print(f"  - {fw.decode()}")